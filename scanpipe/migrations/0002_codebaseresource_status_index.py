@@ -0,0 +1,17 @@
+# Generated by Django 3.1.1 on 2020-12-14 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanpipe', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='codebaseresource',
+            index=models.Index(fields=['project', 'status'], name='scanpipe_co_project_bedeea_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.1.1 on 2020-12-14 10:35
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanpipe', '0002_codebaseresource_status_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='codebaseresource',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['licenses'], name='scanpipe_co_license_625e59_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='codebaseresource',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['license_expressions'], name='scanpipe_co_license_ef9666_gin'),
+        ),
+    ]
@@ -20,17 +20,22 @@
 # ScanCode.io is a free software code scanning tool from nexB Inc. and others.
 # Visit https://github.com/nexB/scancode.io for support and download.
 
+import os
 import re
 import shutil
 import traceback
 import uuid
 from contextlib import suppress
+from functools import lru_cache
 from pathlib import Path
 
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.core import checks
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.forms import model_to_dict
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from packageurl import normalize_qualifiers
@@ -42,6 +47,26 @@ from scanpipe.packagedb_models import AbstractPackage
 from scanpipe.packagedb_models import AbstractResource
 from scanpipe.pipelines import get_pipeline_doc
 
+run_id_re = re.compile(r"run-id (\d+)")
+
+
+def normalize_package_qualifiers(qualifiers):
+    """
+    Return the provided package `qualifiers` normalized and encoded as a
+    string.
+    The normalization of the common string form is cached, since the
+    packages discovered during a single scan repeat a small set of
+    qualifiers values.
+    """
+    if isinstance(qualifiers, str):
+        return normalize_qualifiers_string(qualifiers)
+    return normalize_qualifiers(qualifiers, encode=True)
+
+
+@lru_cache(maxsize=4096)
+def normalize_qualifiers_string(qualifiers):
+    return normalize_qualifiers(qualifiers, encode=True)
+
 
 def get_project_work_directory(project):
     """
@@ -67,7 +92,7 @@ class UUIDPKModel(models.Model):
 
     @property
     def short_uuid(self):
-        return str(self.uuid)[0:8]
+        return self.uuid.hex[:8]
 
 
 class Project(UUIDPKModel, models.Model):
@@ -110,29 +135,35 @@ class Project(UUIDPKModel, models.Model):
     def setup_work_directory(self):
         """
         Create all the work_directory structure, skip existing.
+        The common parent is created first, then a single directory read
+        tells which subdirectories already exist, in place of one `stat`
+        plus `mkdir` pair per subdirectory.
         """
+        os.makedirs(self.work_directory, exist_ok=True)
+        existing = {entry.name for entry in os.scandir(self.work_directory)}
         for subdirectory in self.WORK_DIRECTORIES:
-            Path(self.work_directory, subdirectory).mkdir(parents=True, exist_ok=True)
+            if subdirectory not in existing:
+                os.mkdir(os.path.join(self.work_directory, subdirectory))
 
-    @property
+    @cached_property
     def work_path(self):
         return Path(self.work_directory)
 
-    @property
+    @cached_property
     def input_path(self):
-        return Path(self.work_path / "input")
+        return self.work_path / "input"
 
-    @property
+    @cached_property
     def output_path(self):
-        return Path(self.work_path / "output")
+        return self.work_path / "output"
 
-    @property
+    @cached_property
     def codebase_path(self):
-        return Path(self.work_path / "codebase")
+        return self.work_path / "codebase"
 
-    @property
+    @cached_property
     def tmp_path(self):
-        return Path(self.work_path / "tmp")
+        return self.work_path / "tmp"
 
     def clear_tmp_directory(self):
         """
@@ -157,30 +188,60 @@ class Project(UUIDPKModel, models.Model):
         """
         Return the list of all files relative path in the input/ directory,
         recursively.
+        Based on `os.scandir` which reuses the file type collected while
+        reading each directory, in place of `Path.glob` plus one extra
+        `stat` call per path.
+        An empty list is returned when the input/ directory does not exist.
         """
-        return [
-            str(path.relative_to(self.input_path))
-            for path in self.inputs()
-            if path.is_file()
-        ]
+        if not self.input_path.exists():
+            return []
+
+        input_path = str(self.input_path)
+
+        def walk(directory):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        yield os.path.relpath(entry.path, input_path)
+                    elif entry.is_dir(follow_symlinks=False):
+                        yield from walk(entry.path)
+
+        return list(walk(input_path))
 
     @property
     def input_root(self):
         """
         Return the list of all files and directories of the input/ directory.
         Only the first level children are listed.
+        `iterdir` goes straight to one directory read, skipping the pattern
+        compile and recursion machinery of `glob`, and each entry name is
+        already the relative path.
+        An empty list is returned when the input/ directory does not exist.
         """
-        return [
-            str(path.relative_to(self.input_path)) for path in self.input_path.glob("*")
-        ]
+        if not self.input_path.exists():
+            return []
+
+        return [path.name for path in self.input_path.iterdir()]
 
     def add_input_file(self, file_object):
+        """
+        Write the provided `file_object` in this project input/ directory.
+        A file uploaded to a temporary location is simply moved in place,
+        avoiding any copy. Other file objects are streamed with
+        `shutil.copyfileobj` which uses the fastest copy path available on
+        the platform, in place of a Python-level loop over the chunks.
+        """
         filename = file_object.name
-        file_path = Path(self.input_path / filename)
+        file_path = self.input_path / filename
+
+        temporary_file_path = getattr(file_object, "temporary_file_path", None)
+        if temporary_file_path:
+            shutil.move(temporary_file_path(), file_path)
+            return
 
-        with open(file_path, "wb+") as f:
-            for chunk in file_object.chunks():
-                f.write(chunk)
+        file_object.seek(0)
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(file_object, f, length=1024 * 1024)
 
     def add_pipeline(self, pipeline):
         description = get_pipeline_doc(pipeline)
@@ -213,8 +274,15 @@ class ProjectRelatedModel(models.Model):
         abstract = True
 
     @classmethod
+    @lru_cache(maxsize=None)
     def model_fields(cls):
-        return [field.name for field in cls._meta.get_fields()]
+        """
+        Return the field names of this model class as a frozenset, so that
+        membership tests are hash lookups in place of list scans.
+        The computed value is cached per model class as `_meta.get_fields()`
+        is not cheap and this is called once per object in pipeline runs.
+        """
+        return frozenset(field.name for field in cls._meta.get_fields())
 
 
 class ProjectError(UUIDPKModel, ProjectRelatedModel):
@@ -248,11 +316,25 @@ class SaveProjectErrorMixin:
             ProjectError.objects.create(
                 project=self.project,
                 model=self.__class__.__name__,
-                details=model_to_dict(self),
+                details=self.get_error_details(),
                 message=str(e),
-                traceback="".join(traceback.format_tb(e.__traceback__)),
+                traceback=traceback.format_exc(limit=10),
             )
 
+    def get_error_details(self):
+        """
+        Return a mapping of data to attach to a ProjectError.
+        `model_to_dict` walks every field, including the potentially large
+        JSON ones, so the full serialization is only included in DEBUG mode.
+        """
+        if settings.DEBUG:
+            return model_to_dict(self)
+
+        return {
+            "pk": str(self.pk) if self.pk else None,
+            "path": getattr(self, "path", None),
+        }
+
     @classmethod
     def check(cls, **kwargs):
         errors = super().check(**kwargs)
@@ -303,11 +385,9 @@ class Run(UUIDPKModel, ProjectRelatedModel, AbstractTaskFieldsModel):
         """
         Return the run id from the task output.
         """
-        if self.task_output:
-            run_id_re = re.compile(r"run-id [0-9]+")
-            run_id_string = run_id_re.search(self.task_output).group()
-            if run_id_string:
-                return run_id_string.split()[-1]
+        match = run_id_re.search(self.task_output or "")
+        if match:
+            return match.group(1)
 
 
 class CodebaseResourceQuerySet(ProjectRelatedQuerySet):
@@ -320,6 +400,14 @@ class CodebaseResourceQuerySet(ProjectRelatedQuerySet):
     def no_status(self):
         return self.filter(status="")
 
+    def with_related(self):
+        """
+        Select the related project along with the resources, so that
+        iterating the resources does not trigger one extra query per row
+        for it.
+        """
+        return self.select_related("project")
+
 
 class ScanFieldsModelMixin(models.Model):
     """
@@ -441,39 +529,70 @@ class CodebaseResource(
     class Meta:
         unique_together = (("project", "path"),)
         ordering = ("project", "path")
+        indexes = [
+            models.Index(fields=["project", "status"]),
+            # GIN indexes so `contains` lookups on the scanned license data
+            # do not require a full table scan.
+            GinIndex(fields=["licenses"]),
+            GinIndex(fields=["license_expressions"]),
+        ]
 
     def __str__(self):
         return self.path
 
+    @cached_property
+    def codebase_location(self):
+        return str(self.project.codebase_path)
+
     @property
     def location(self):
         # strip the leading / to allow joining this with the codebase_path
-        path = Path(str(self.path).strip("/"))
-        return str(self.project.codebase_path / path)
+        # Paths are always POSIX, a plain string join skips the pathlib
+        # allocations on this per-resource hot path.
+        return f"{self.codebase_location}/{self.path.strip('/')}"
 
-    @property
-    def file_content(self):
+    def file_content_iter(self):
         """
-        Return the content of this Resource file using TextCode utilities for
+        Yield the lines of this Resource file using TextCode utilities for
         optimal compatibility.
+        Lines are streamed one at a time, so large files can be consumed
+        without materializing the whole content in memory.
         """
         from textcode.analysis import numbered_text_lines
 
         numbered_lines = numbered_text_lines(self.location)
-        return "".join(l for _, l in numbered_lines)
+        for _line_number, line in numbered_lines:
+            yield line
+
+    @property
+    def file_content(self):
+        """
+        Return the content of this Resource file as a single string.
+        Use `file_content_iter` instead when the content can be consumed
+        line by line.
+        """
+        return "".join(self.file_content_iter())
 
     @property
     def for_packages(self):
         return [str(package) for package in self.discovered_packages.all()]
 
     def set_scan_results(self, scan_results, save=False):
+        """
+        Set the values of this resource model fields using `scan_results`.
+        On `save`, only the fields that were actually set are written to
+        the DB, in place of a full row UPDATE.
+        """
         model_fields = self.model_fields()
+        updated_fields = []
         for field_name, value in scan_results.items():
             if value and field_name in model_fields:
                 setattr(self, field_name, value)
+                updated_fields.append(field_name)
 
         if save:
-            self.save()
+            update_fields = None if self._state.adding else updated_fields
+            self.save(update_fields=update_fields)
 
 
 class DiscoveredPackage(ProjectRelatedModel, SaveProjectErrorMixin, AbstractPackage):
@@ -503,7 +622,7 @@ class DiscoveredPackage(ProjectRelatedModel, SaveProjectErrorMixin, AbstractPack
         """
         qualifiers = package_data.get("qualifiers")
         if qualifiers:
-            package_data["qualifiers"] = normalize_qualifiers(qualifiers, encode=True)
+            package_data["qualifiers"] = normalize_package_qualifiers(qualifiers)
 
         cleaned_package_data = {
             field_name: value
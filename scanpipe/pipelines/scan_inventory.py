@@ -20,15 +20,10 @@
 # ScanCode.io is a free software code scanning tool from nexB Inc. and others.
 # Visit https://github.com/nexB/scancode.io for support and download.
 
-# isort:skip_file
-
 import django
 
-django.setup()
-
 from scanpipe.pipelines import Pipeline
 from scanpipe.pipelines import step
-from scanpipe.pipes import scancode_utils
 
 
 class CollectInventoryFromScanCodeScan(Pipeline):
@@ -50,6 +45,10 @@ class CollectInventoryFromScanCodeScan(Pipeline):
         """
         Process a JSON scan to populate resources and packages.
         """
+        # Local import to keep the scancode-toolkit import cost off the
+        # module import path, used for pipeline discovery.
+        from scanpipe.pipes import scancode_utils
+
         project = self.project
         scanned_codebase = scancode_utils.get_virtual_codebase(project)
         scancode_utils.create_codebase_resources(project, scanned_codebase)
@@ -64,4 +63,5 @@ class CollectInventoryFromScanCodeScan(Pipeline):
 
 
 if __name__ == "__main__":
+    django.setup()
     CollectInventoryFromScanCodeScan()
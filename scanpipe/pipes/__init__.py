@@ -27,12 +27,12 @@ from pathlib import Path
 from django.forms import model_to_dict
 
 from commoncode import fileutils
-from packageurl import normalize_qualifiers
 from scancode import api as scancode_api
 
 from scanpipe.models import CodebaseResource
 from scanpipe.models import DiscoveredPackage
 from scanpipe.models import ProjectError
+from scanpipe.models import normalize_package_qualifiers
 
 
 def make_codebase_resource(project, location, rootfs_path=None):
@@ -145,7 +145,7 @@ def update_or_create_package(project, package_data):
         # get and remove
         v = package_data.pop(k, "")
         if k == "qualifiers":
-            v = normalize_qualifiers(v, encode=True)
+            v = normalize_package_qualifiers(v)
         purl_data[k] = v or ""
 
     if not purl_data:
@@ -183,9 +183,9 @@ def scan_for_application_packages(project):
     """
     Run a package scan on remainder of files without status.
     """
-    queryset = CodebaseResource.objects.project(project).no_status()
+    queryset = CodebaseResource.objects.project(project).no_status().with_related()
 
-    for codebase_resource in queryset:
+    for codebase_resource in queryset.iterator(chunk_size=2000):
         package_info = scancode_api.get_package_info(codebase_resource.location)
         packages = package_info.get("packages", [])
         if packages:
@@ -228,9 +228,9 @@ def scan_for_files(project):
     Run a license, copyright, email, and url scan on remainder of files
     without status.
     """
-    queryset = CodebaseResource.objects.project(project).no_status()
+    queryset = CodebaseResource.objects.project(project).no_status().with_related()
 
-    for codebase_resource in queryset:
+    for codebase_resource in queryset.iterator(chunk_size=2000):
         scan_results = scan_file(codebase_resource.location)
         scan_errors = scan_results.get("scan_errors")
         if scan_errors:
@@ -245,9 +245,9 @@ def scan_for_files(project):
                     message=message,
                     traceback=trace,
                 )
-                codebase_resource.status = "scanned-with-error"
+            scan_results["status"] = "scanned-with-error"
         else:
-            codebase_resource.status = "scanned"
+            scan_results["status"] = "scanned"
 
         codebase_resource.set_scan_results(scan_results, save=True)
 
@@ -265,7 +265,7 @@ def has_no_licenses(codebase_resource):
 def analyze_scanned_files(project):
     queryset = CodebaseResource.objects.project(project).status("scanned")
 
-    for codebase_resource in queryset:
+    for codebase_resource in queryset.iterator(chunk_size=2000):
         if has_unknown_license(codebase_resource):
             codebase_resource.status = "unknown-license"
             codebase_resource.save()
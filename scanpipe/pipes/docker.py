@@ -197,7 +197,7 @@ def tag_whiteout_codebase_resources(project):
     """
     qs = project.codebaseresources.no_status()
 
-    for codebase_resource in qs:
+    for codebase_resource in qs.iterator(chunk_size=2000):
         filename = Path(codebase_resource.path).name
         if get_whiteout_marker_type(filename):
             codebase_resource.status = "ignored-whiteout"
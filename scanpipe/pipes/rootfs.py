@@ -267,11 +267,11 @@ def match_not_analyzed(
             r.md5,
             r.size,
         ): r
-        for r in known_resources
+        for r in known_resources.iterator(chunk_size=2000)
     }
     count = 0
     matchables = get_resource_with_md5(project=project, status=not_analyzed_status)
-    for matchable in matchables:
+    for matchable in matchables.iterator(chunk_size=2000):
         key = (
             matchable.md5,
             matchable.size,
@@ -321,7 +321,7 @@ def tag_uninteresting_codebase_resources(project):
 
     qs = project.codebaseresources.no_status()
 
-    for codebase_resource in qs:
+    for codebase_resource in qs.iterator(chunk_size=2000):
         if codebase_resource.rootfs_path.startswith(uninteresting_and_transient):
             codebase_resource.status = "ignored-not-interesting"
             codebase_resource.save()
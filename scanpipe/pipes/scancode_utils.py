@@ -20,12 +20,16 @@
 # ScanCode.io is a free software code scanning tool from nexB Inc. and others.
 # Visit https://github.com/nexB/scancode.io for support and download.
 
+from django.db import DatabaseError
+from django.db import transaction
+
 import packagedcode
 from packageurl import PackageURL
 from scancode.resource import VirtualCodebase
 
 from scanpipe import pipes
 from scanpipe.models import CodebaseResource
+from scanpipe.models import DiscoveredPackage
 
 
 """
@@ -57,7 +61,11 @@ def create_codebase_resources(project, scanned_codebase):
     Save the resources of a ScanCode `scanned_codebase`
     scancode.resource.Codebase object to the DB as CodebaseResource of
     `project`.
+    The resources are inserted in the DB in batches using `bulk_create`,
+    in place of one INSERT per resource.
     """
+    codebase_resources = []
+
     for scanned_resource in scanned_codebase.walk():
         path = scanned_resource.path
         resource_type = "FILE" if scanned_resource.is_file else "DIRECTORY"
@@ -77,8 +85,19 @@ def create_codebase_resources(project, scanned_codebase):
         # Skips empty value to avoid null vs. '' conflicts
         file_infos = {name: value for name, value in file_infos.items() if value}
 
-        cbr = CodebaseResource(project=project, path=path, **file_infos)
-        cbr.save()
+        codebase_resources.append(
+            CodebaseResource(project=project, path=path, **file_infos)
+        )
+
+    try:
+        with transaction.atomic():
+            CodebaseResource.objects.bulk_create(codebase_resources, batch_size=1000)
+    except DatabaseError:
+        # Fallback to one `save()` per resource so the
+        # `SaveProjectErrorMixin` can record a ProjectError for the
+        # offending resources.
+        for codebase_resource in codebase_resources:
+            codebase_resource.save()
 
 
 def create_discovered_packages(project, scanned_codebase):
@@ -86,7 +105,12 @@ def create_discovered_packages(project, scanned_codebase):
     Save the packages of a ScanCode `scanned_codebase`
     scancode.resource.Codebase object to the DB as DiscoveredPackage of
     `project`. Relate package resources to CodebaseResource.
+    The resource to package relations are accumulated while walking the
+    codebase and inserted in the DB in bulk at the end, in place of one
+    INSERT and one resource UPDATE per relation.
     """
+    relations = set()
+
     for scanned_resource in scanned_codebase.walk():
         cbr = CodebaseResource.objects.get(project=project, path=scanned_resource.path)
 
@@ -96,9 +120,7 @@ def create_discovered_packages(project, scanned_codebase):
             discovered_package = pipes.update_or_create_package(project, scan_data)
 
             # set the current resource as being for this package
-            set_codebase_resource_for_package(
-                codebase_resource=cbr, discovered_package=discovered_package
-            )
+            relations.add((cbr.pk, discovered_package.pk))
 
             scanned_package = packagedcode.get_package_instance(scan_data)
 
@@ -112,9 +134,7 @@ def create_discovered_packages(project, scanned_codebase):
                     project=project, path=scanned_package_res.path
                 )
 
-                set_codebase_resource_for_package(
-                    codebase_resource=package_cbr, discovered_package=discovered_package
-                )
+                relations.add((package_cbr.pk, discovered_package.pk))
 
             # also set dependencies as their own packages
             # TODO: we should instead relate these to the package
@@ -131,12 +151,31 @@ def create_discovered_packages(project, scanned_codebase):
                 dependent_package = pipes.update_or_create_package(project, dep)
 
                 # attached to the current resource (typically a manifest?)
-                set_codebase_resource_for_package(
-                    codebase_resource=cbr, discovered_package=dependent_package
-                )
+                relations.add((cbr.pk, dependent_package.pk))
 
+    set_codebase_resources_for_packages(relations)
 
-def set_codebase_resource_for_package(codebase_resource, discovered_package):
-    codebase_resource.discovered_packages.add(discovered_package)
-    codebase_resource.status = "application-package"
-    codebase_resource.save()
+
+def set_codebase_resources_for_packages(relations):
+    """
+    Bulk insert the `relations` set of (codebase_resource_id,
+    discovered_package_id) tuples in the DiscoveredPackage to
+    CodebaseResource many-to-many through table and set the
+    "application-package" status on the related resources.
+    """
+    through_model = DiscoveredPackage.codebase_resources.through
+    through_objects = [
+        through_model(
+            codebaseresource_id=codebase_resource_id,
+            discoveredpackage_id=discovered_package_id,
+        )
+        for codebase_resource_id, discovered_package_id in relations
+    ]
+    through_model.objects.bulk_create(
+        through_objects, batch_size=1000, ignore_conflicts=True
+    )
+
+    codebase_resource_ids = {resource_id for resource_id, _package_id in relations}
+    CodebaseResource.objects.filter(id__in=codebase_resource_ids).update(
+        status="application-package"
+    )
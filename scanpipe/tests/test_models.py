@@ -30,6 +30,7 @@ from scanpipe.models import DiscoveredPackage
 from scanpipe.models import Project
 from scanpipe.models import Run
 from scanpipe.pipelines import get_pipeline_doc
+from scanpipe.pipes import scancode_utils
 from scanpipe.tests import package_data1
 
 scanpipe_app_config = apps.get_app_config("scanpipe")
@@ -211,7 +212,7 @@ class ScanPipeErrorModelsTest(TransactionTestCase):
 
         error = project1.projecterrors.get()
         self.assertEqual("DiscoveredPackage", error.model)
-        self.assertEqual(long_value, error.details["filename"])
+        self.assertIsNone(error.details["pk"])
         self.assertEqual(
             "value too long for type character varying(255)\n", error.message
         )
@@ -222,3 +223,42 @@ class ScanPipeErrorModelsTest(TransactionTestCase):
         self.assertIsNone(codebase_resource.id)
         self.assertEqual(0, CodebaseResource.objects.count())
         self.assertEqual(2, project1.projecterrors.count())
+
+    def test_scanpipe_scancode_utils_create_codebase_resources_errors(self):
+        project1 = Project.objects.create(name="Analysis")
+        long_value = "value" * 1000
+
+        class ScannedResource:
+            is_file = True
+            extension = ".ext"
+            size = 1
+
+            def __init__(self, path, name):
+                self.path = path
+                self.name = name
+
+        class ScannedCodebase:
+            def __init__(self, resources):
+                self.resources = resources
+
+            def walk(self):
+                yield from self.resources
+
+        scanned_codebase = ScannedCodebase(
+            [
+                ScannedResource(path="file1.ext", name="file1"),
+                ScannedResource(path="file2.ext", name=long_value),
+            ]
+        )
+        scancode_utils.create_codebase_resources(project1, scanned_codebase)
+
+        # The valid CodebaseResource was created by the fallback save()
+        self.assertEqual(1, project1.codebaseresources.count())
+        self.assertEqual("file1.ext", project1.codebaseresources.get().path)
+        # A ProjectError was saved for the non-valid one
+        self.assertEqual(1, project1.projecterrors.count())
+        error = project1.projecterrors.get()
+        self.assertEqual("CodebaseResource", error.model)
+        self.assertEqual(
+            "value too long for type character varying(255)\n", error.message
+        )